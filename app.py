@@ -6,16 +6,63 @@ Streamlit UI for Wedding Dress Analyzer
 """
 
 import os
-import json
-from datetime import datetime
+import io
+import csv
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
+import orjson
 import pandas as pd
 import streamlit as st
+import xxhash
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from dress_prompt_generator import DressPromptGenerator
-from PIL import Image
+
+
+# 동시에 진행할 이미지 분석 API 호출 수
+ANALYSIS_MAX_WORKERS = 4
+
+
+@st.cache_resource(show_spinner=False)
+def get_generator(api_key: Optional[str]) -> DressPromptGenerator:
+    # API 클라이언트(HTTP 연결 포함)를 재사용하기 위해 API 키별로 한 번만 생성
+    return DressPromptGenerator(api_key=api_key)
+
+
+def image_cache_key(image_bytes: bytes) -> str:
+    # 이미지 바이트의 빠른 해시 (캐시 키 계산 비용 최소화)
+    return xxhash.xxh3_64_hexdigest(image_bytes)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def analyze_image_cached(
+    image_key: str, file_name: str, api_key: Optional[str], _image_bytes: bytes
+) -> Dict[str, Any]:
+    # 같은 이미지를 다시 분석하면 API를 호출하지 않고 이전 결과 재사용
+    # 캐시 키는 image_key로 계산하고, _image_bytes는 해시 대상에서 제외됨
+    # file_name은 media type 판별에만 사용
+    return get_generator(api_key).analyze_dress_image(file_name, image_bytes=_image_bytes)
+
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_executor() -> ThreadPoolExecutor:
+    # 여러 이미지의 API 호출(네트워크 대기)을 겹쳐서 실행하기 위한 공용 스레드 풀
+    return ThreadPoolExecutor(max_workers=ANALYSIS_MAX_WORKERS)
+
+
+def submit_with_script_context(executor: ThreadPoolExecutor, fn, *args) -> Future:
+    # 작업 스레드에서도 st.cache_data 등을 쓸 수 있도록 현재 스크립트 컨텍스트를 전달
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return executor.submit(run)
 
 
 def get_default_save_dir() -> Path:
@@ -72,28 +119,83 @@ def load_store(store_path: Path) -> List[Dict[str, Any]]:
     if not store_path.exists():
         return []
     rows: List[Dict[str, Any]] = []
-    with open(store_path, "r", encoding="utf-8") as f:
+    with open(store_path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                rows.append(json.loads(line))
+                rows.append(orjson.loads(line))
             except Exception:
                 # 손상된 라인은 무시
                 continue
     return rows
 
 
+@st.cache_data(show_spinner=False)
+def _load_store_cached(path: str, mtime_ns: int, size: int) -> List[Dict[str, Any]]:
+    # mtime_ns/size는 캐시 키로만 사용 (파일이 바뀌면 새로 로드)
+    return load_store(Path(path))
+
+
+def load_store_cached(store_path: Path) -> List[Dict[str, Any]]:
+    """파일이 변경되지 않았으면 이전에 파싱한 결과를 재사용"""
+    try:
+        stat = store_path.stat()
+    except FileNotFoundError:
+        return []
+    return _load_store_cached(str(store_path), stat.st_mtime_ns, stat.st_size)
+
+
+def load_store_tail(store_path: Path, k: int, chunk_size: int = 65536) -> List[Dict[str, Any]]:
+    """
+    JSONL 파일 끝에서부터 역방향으로 읽어 최근 k개 레코드만 로드
+
+    Args:
+        store_path: JSONL 파일 경로
+        k: 로드할 최근 레코드 수
+        chunk_size: 한 번에 역방향으로 읽을 바이트 수
+
+    Returns:
+        최근 k개 레코드 리스트 (파일에 저장된 순서 유지)
+    """
+    if k <= 0 or not store_path.exists():
+        return []
+    with open(store_path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""
+        # 완전한 라인이 k개 이상 모일 때까지 뒤에서부터 청크 단위로 읽기
+        while pos > 0 and buf.count(b"\n") <= k:
+            read_size = min(chunk_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            buf = f.read(read_size) + buf
+    lines = buf.split(b"\n")
+    if pos > 0:
+        # 첫 조각은 잘린 라인일 수 있으므로 제외
+        lines = lines[1:]
+    rows: List[Dict[str, Any]] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(orjson.loads(line))
+        except Exception:
+            # 손상된 라인은 무시
+            continue
+    return rows[-k:]
+
+
 def append_store(store_path: Path, row: Dict[str, Any]) -> None:
-    with open(store_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    with open(store_path, "ab") as f:
+        f.write(orjson.dumps(row) + b"\n")
 
 
 def overwrite_store(store_path: Path, rows: List[Dict[str, Any]]) -> None:
-    with open(store_path, "w", encoding="utf-8") as f:
+    with open(store_path, "wb") as f:
         for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.write(orjson.dumps(row) + b"\n")
 
 
 def generate_dress_name_and_id(
@@ -120,8 +222,6 @@ def generate_dress_name_and_id(
     Returns:
         (name, id) 튜플
     """
-    from dress_prompt_generator import DressPromptGenerator
-    
     # 한국어 -> 영문 변환 맵
     korean_to_english = DressPromptGenerator.KOREAN_TO_ENGLISH
     
@@ -186,26 +286,249 @@ def generate_dress_name_and_id(
     return final_name, final_id
 
 
-def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
-    schema = record.get("schema", {}) or {}
-    flat = {
-        "id": record.get("id"),
-        "created_at": record.get("created_at"),
-        "image_name": record.get("image_name"),
-        "original_name": record.get("original_name", ""),
-        "file_path": record.get("file_path", ""),
-        "prompt": record.get("prompt"),
-        "name": schema.get("name"),
-        "line": ", ".join(schema.get("line", []) or []),
-        "material": ", ".join(schema.get("material", []) or []),
-        "color": schema.get("color"),
-        "neckline": ", ".join(schema.get("neckline", []) or []),
-        "sleeve": ", ".join(schema.get("sleeve", []) or []),
-        "keyword": ", ".join(schema.get("keyword", []) or []),
-        "detail": ", ".join(schema.get("detail", []) or []),
-        "dress_lengths": ", ".join(schema.get("dress_lengths", []) or []),
-    }
-    return flat
+FLAT_COLUMNS = [
+    "id", "created_at", "image_name", "original_name", "file_path", "prompt",
+    "name", "line", "material", "color", "neckline", "sleeve", "keyword", "detail", "dress_lengths",
+]
+FLAT_LIST_FIELDS = ("line", "material", "neckline", "sleeve", "keyword", "detail", "dress_lengths")
+
+
+def build_flat_dataframe(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """레코드 목록을 표시용 플랫 DataFrame으로 변환 (json_normalize로 한 번에 생성)"""
+    df = pd.json_normalize(rows, sep=".").rename(columns={"schema.name": "name", "schema.color": "color"})
+    # 일부 레코드에만 있는 컬럼도 항상 존재하도록 보정
+    df = df.reindex(columns=[c for c in FLAT_COLUMNS if c not in FLAT_LIST_FIELDS])
+    df[["original_name", "file_path"]] = df[["original_name", "file_path"]].fillna("")
+    for col in FLAT_LIST_FIELDS:
+        df[col] = pd.Series(
+            [(r.get("schema") or {}).get(col) or [] for r in rows], index=df.index, dtype=object
+        ).map(", ".join)
+    return df[FLAT_COLUMNS]
+
+
+@st.cache_data(show_spinner=False)
+def _flat_view_cached(path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    return build_flat_dataframe(_load_store_cached(path, mtime_ns, size))
+
+
+def load_flat_view(store_path: Path, rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """저장 파일 전체의 플랫 DataFrame (파일이 바뀌지 않았으면 캐시 재사용)"""
+    try:
+        stat = store_path.stat()
+    except FileNotFoundError:
+        return build_flat_dataframe(rows)
+    return _flat_view_cached(str(store_path), stat.st_mtime_ns, stat.st_size)
+
+
+# JSON 다운로드 직렬화 옵션 (json.dumps(indent=2)와 같은 들여쓰기)
+JSON_EXPORT_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+CSV_RECORD_FIELDS = ("id", "created_at", "image_name", "original_name", "prompt")
+# (스키마 키, JSON 배열 문자열로 변환할지 여부)
+CSV_SCHEMA_FIELDS = (
+    ("name", False),
+    ("line", True),
+    ("material", True),
+    ("color", False),
+    ("neckline", True),
+    ("sleeve", True),
+    ("keyword", True),
+    ("detail", True),
+    ("dress_lengths", True),
+)
+CSV_COLUMNS = [*CSV_RECORD_FIELDS, *(key for key, _ in CSV_SCHEMA_FIELDS)]
+
+
+def dump_json_list(values: List[str]) -> str:
+    # 빈 리스트는 매번 직렬화하지 않고 상수 문자열 사용
+    if not values:
+        return "[]"
+    return orjson.dumps(values).decode("utf-8")
+
+
+def to_csv_values(record: Dict[str, Any]) -> List[Any]:
+    """Supabase 업로드용 CSV 한 행 (CSV_COLUMNS 순서)"""
+    schema = record.get("schema") or {}
+    return [
+        record.get("id"),
+        record.get("created_at"),
+        record.get("image_name"),
+        record.get("original_name", ""),
+        record.get("prompt"),
+        *[dump_json_list(schema.get(key)) if is_json else schema.get(key) for key, is_json in CSV_SCHEMA_FIELDS],
+    ]
+
+
+def build_csv_buffer(rows: List[Dict[str, Any]]) -> io.BytesIO:
+    """DataFrame을 거치지 않고 csv.writer로 CSV(UTF-8 BOM)를 버퍼에 바로 기록"""
+    buf = io.BytesIO()
+    text = io.TextIOWrapper(buf, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    for r in rows:
+        writer.writerow(to_csv_values(r))
+    text.flush()
+    text.detach()
+    buf.seek(0)
+    return buf
+
+
+def build_json_buffer(rows: List[Dict[str, Any]]) -> io.BytesIO:
+    """레코드를 하나씩 직렬화하여 JSON 배열을 버퍼에 기록 (전체 문자열을 따로 만들지 않음)"""
+    buf = io.BytesIO()
+    buf.write(b"[")
+    for i, r in enumerate(rows):
+        buf.write(b",\n" if i else b"\n")
+        buf.write(orjson.dumps(r, option=JSON_EXPORT_OPTIONS))
+    buf.write(b"\n]" if rows else b"]")
+    buf.seek(0)
+    return buf
+
+
+def get_export_timestamp() -> str:
+    # 다운로드 파일명용 타임스탬프 (데이터가 바뀔 때까지 같은 값 유지)
+    return st.session_state.setdefault("export_ts", datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S"))
+
+
+def build_id_index(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # id 문자열 -> 레코드 매핑 (선택 작업 시 매번 전체 스캔하지 않도록 한 번만 생성)
+    return {str(r.get("id")): r for r in rows}
+
+
+def parse_ids(ids_text: str) -> List[str]:
+    # 쉼표로 구분된 id 문자열을 중복 없이 순서대로 파싱
+    if not ids_text:
+        return []
+    return list(dict.fromkeys(s.strip() for s in ids_text.split(",") if s.strip()))
+
+
+def filter_rows_by_ids(index: Dict[str, Dict[str, Any]], ids: List[str]) -> List[Dict[str, Any]]:
+    if not ids:
+        return list(index.values())
+    return [index[i] for i in ids if i in index]
+
+
+ROW_PAGE_SIZE = 20
+
+
+def reset_row_selector() -> None:
+    # 모든 페이지의 선택 표 편집 상태 제거
+    for key in [k for k in st.session_state if str(k).startswith("row_selector")]:
+        del st.session_state[key]
+
+
+def render_row_selector(flat_df: pd.DataFrame) -> None:
+    """
+    행 선택 표 렌더링 (플랫 DataFrame의 id/image_name/name 컬럼 사용)
+
+    선택 결과는 st.session_state["selected_rows"]에 저장됩니다.
+    """
+    # 전체 선택/해제 버튼
+    col_select_all, col_clear_all = st.columns(2)
+    with col_select_all:
+        if st.button("전체 선택"):
+            # 모든 행의 ID를 선택 상태로 설정
+            st.session_state["selected_rows"] = set(flat_df["id"].astype(str))
+            # 선택 표의 편집 상태를 초기화하여 새 선택이 반영되도록 함
+            reset_row_selector()
+            st.rerun()
+    with col_clear_all:
+        if st.button("전체 해제"):
+            # 모든 선택 해제
+            st.session_state["selected_rows"] = set()
+            reset_row_selector()
+            st.rerun()
+    
+    # 현재 페이지의 행만 잘라서 처리
+    total = len(flat_df)
+    page_count = max(1, -(-total // ROW_PAGE_SIZE))
+    if st.session_state.get("row_page", 1) > page_count:
+        # 삭제 등으로 페이지 수가 줄어든 경우 마지막 페이지로 보정
+        st.session_state["row_page"] = page_count
+    page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, key="row_page") - 1
+    start = page * ROW_PAGE_SIZE
+    st.caption(f"{start + 1}-{min(start + ROW_PAGE_SIZE, total)} / {total}")
+    
+    # 체크박스 열이 있는 단일 표로 선택 (행마다 위젯을 만들지 않음)
+    selected = st.session_state["selected_rows"]
+    selector_df = flat_df.iloc[start:start + ROW_PAGE_SIZE][["id", "image_name", "name"]].astype({"id": str})
+    selector_df.insert(0, "select", selector_df["id"].isin(selected))
+    # 편집 상태는 행 위치 기준으로 저장되므로 표시 중인 id가 바뀌면 새 편집기로 시작
+    # (레코드가 추가되어 행이 밀리면 체크가 다른 레코드로 옮겨가는 것을 방지)
+    ids_digest = xxhash.xxh3_64_hexdigest("\0".join(selector_df["id"]).encode("utf-8"))
+    editor_key = f"row_selector_p{page}_{ids_digest}"
+    for key in [k for k in st.session_state if str(k).startswith(f"row_selector_p{page}_") and k != editor_key]:
+        del st.session_state[key]
+    edited = st.data_editor(
+        selector_df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "select": st.column_config.CheckboxColumn("선택"),
+            "id": "ID",
+            "image_name": "파일",
+            "name": "이름",
+        },
+        disabled=["id", "image_name", "name"],
+        key=editor_key,
+    )
+    # 다른 페이지의 선택은 유지하고 현재 페이지의 선택만 교체
+    page_ids = set(selector_df["id"])
+    st.session_state["selected_rows"] = (selected - page_ids) | set(edited.loc[edited["select"], "id"].astype(str))
+
+
+SELECTION_ACTIONS = ["클립보드로 복사 (플랫 텍스트)", "JSON 다운로드", "CSV 다운로드 (Supabase용)", "선택 삭제"]
+
+
+def sync_manual_ids() -> None:
+    # 체크박스 선택이 바뀐 경우에만 id 입력란을 선택 내용으로 갱신 (수동 편집은 유지)
+    selected = frozenset(st.session_state["selected_rows"])
+    if st.session_state.get("manual_ids_synced") != selected:
+        st.session_state["manual_ids"] = ",".join(sorted(selected))
+        st.session_state["manual_ids_synced"] = selected
+
+
+@st.fragment
+def render_selection_panel(flat_df: pd.DataFrame, run_action: Callable[[str, List[str]], None]) -> None:
+    """
+    행 선택 표, 선택 요약, 작업 폼을 함께 렌더링
+
+    fragment로 분리되어 있어 체크박스를 바꿀 때 이 영역만 다시 실행되며,
+    선택 개수와 id 입력란도 같은 실행에서 갱신되어 항상 현재 선택과 일치합니다.
+
+    Args:
+        flat_df: 행 선택 표에 사용할 플랫 DataFrame
+        run_action: 폼 제출 시 (작업 이름, id 목록)으로 호출할 함수
+    """
+    render_row_selector(flat_df)
+    
+    st.markdown("---")
+    st.subheader("선택된 데이터 작업")
+    
+    notice = st.session_state.pop("selection_notice", None)
+    if notice:
+        st.success(notice)
+    
+    # 선택된 항목 표시
+    if st.session_state["selected_rows"]:
+        st.info(f"선택된 항목: {len(st.session_state['selected_rows'])}개")
+    else:
+        st.warning("선택된 항목이 없습니다.")
+    sync_manual_ids()
+    
+    # 입력과 작업 선택을 폼으로 묶어 제출 시 한 번만 실행
+    with st.form("export_form", clear_on_submit=False):
+        # 기존 수동 입력 방식도 유지 (key를 고정해 선택이 바뀌어도 같은 위젯으로 유지)
+        st.text_input(
+            "또는 수동으로 id 입력 (쉼표로 구분)",
+            key="manual_ids",
+            help="체크박스 선택과 수동 입력을 함께 사용할 수 있습니다.",
+        )
+        action = st.radio("작업 선택", SELECTION_ACTIONS, horizontal=True)
+        submitted = st.form_submit_button("실행", type="primary")
+
+    if submitted:
+        run_action(action, parse_ids(st.session_state["manual_ids"]))
 
 
 def main() -> None:
@@ -235,6 +558,13 @@ def main() -> None:
         auto_rename = st.checkbox("분석 후 파일명을 schema.name으로 변경", value=True)
         st.divider()
         view_mode = st.radio("보기 모드", ["플랫", "원본 JSON", "CSV"], index=0)
+        tail_size = st.number_input(
+            "최근 항목만 표시 (0 = 전체)",
+            min_value=0,
+            value=0,
+            step=10,
+            help="데이터 관리 표에 파일 끝의 최근 N개만 읽어 표시합니다. 전체 내보내기/삭제는 항상 전체 데이터를 사용합니다.",
+        )
         st.divider()
         st.markdown(f"데이터 파일: `{store_path}`")
         st.markdown(f"이미지 저장 폴더: `{get_dress_images_dir()}`")
@@ -254,11 +584,13 @@ def main() -> None:
 
     if should_run:
         try:
-            generator = DressPromptGenerator(api_key=api_key or None)
+            get_generator(api_key or None)
         except Exception as e:
             st.error(f"생성기 초기화 실패: {e}")
             st.stop()
 
+        executor = get_analysis_executor()
+        pending = []
         for file in uploaded_files:
             # 자동 실행 시 같은 파일명은 중복 처리하지 않음
             if trigger_auto and file.name in st.session_state["_processed_names"]:
@@ -268,9 +600,17 @@ def main() -> None:
             original_name = file.name
             saved_path = save_uploaded_file(file, original_name)
             
+            # 2. 업로드된 바이트로 분석 요청 (API 호출은 여러 이미지가 동시에 진행)
+            image_bytes = file.getvalue()
+            future = submit_with_script_context(
+                executor, analyze_image_cached, image_cache_key(image_bytes), original_name, api_key or None, image_bytes
+            )
+            pending.append((file, original_name, saved_path, future))
+
+        # 결과 처리와 화면 출력은 업로드 순서대로 메인 스레드에서 수행
+        for file, original_name, saved_path, future in pending:
             try:
-                # 2. 저장된 파일로 분석 수행
-                result = generator.analyze_dress_image(str(saved_path))
+                result = future.result()
             except Exception as e:
                 st.error(f"분석 실패({file.name}): {e}")
                 saved_path.unlink(missing_ok=True)  # 분석 실패 시 저장된 파일 삭제
@@ -308,9 +648,10 @@ def main() -> None:
                     st.warning(f"파일명 변경 실패({original_name}): {e}")
                     new_name = original_name  # 변경 실패 시 원본 이름 사용
 
+            now = datetime.now(timezone.utc)
             record = {
-                "id": datetime.utcnow().strftime("%Y%m%d%H%M%S%f"),
-                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "id": now.strftime("%Y%m%d%H%M%S%f"),
+                "created_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
                 "image_name": Path(final_path).stem,  # 확장자 없는 파일명
                 "original_name": original_name,  # 원본 파일명
                 "file_path": str(final_path),  # 실제 파일 경로 (확장자 포함)
@@ -318,6 +659,7 @@ def main() -> None:
                 "schema": result.get("schema"),
             }
             append_store(store_path, record)
+            st.session_state.pop("export_ts", None)
             st.session_state["_processed_names"].add(file.name)
 
         st.success("분석 및 저장이 완료되었습니다.")
@@ -326,7 +668,7 @@ def main() -> None:
     st.divider()
     st.subheader("이미지 보기 및 편집")
     
-    rows = load_store(store_path)
+    rows = load_store_cached(store_path)
     if not rows:
         st.info("저장된 데이터가 없습니다. 이미지를 업로드하여 분석해 보세요.")
     else:
@@ -394,8 +736,8 @@ def main() -> None:
                     st.markdown("### 이미지")
                     if file_path and Path(file_path).exists():
                         try:
-                            img = Image.open(file_path)
-                            st.image(img, use_container_width=True)
+                            # 경로를 그대로 전달 (PIL로 디코드 후 다시 인코딩하지 않음)
+                            st.image(file_path, use_container_width=True)
                         except Exception as e:
                             st.error(f"이미지 로드 실패: {e}")
                     else:
@@ -865,6 +1207,7 @@ def main() -> None:
                         
                         # 즉시 파일에 저장 (하단 표에 반영되도록)
                         overwrite_store(store_path, edit_records)
+                        st.session_state.pop("export_ts", None)
                         
                         # ID가 변경된 경우 알림
                         if final_id != base_id:
@@ -888,6 +1231,7 @@ def main() -> None:
                 # 최종 데이터 저장 (이미 저장되어 있지만, 확실히 하기 위해 다시 저장)
                 if st.button("데이터 저장", type="primary"):
                     overwrite_store(store_path, edit_records)
+                    st.session_state.pop("export_ts", None)
                     st.success("데이터가 저장되었습니다!")
                     st.session_state["edit_mode"] = False
                     st.session_state["edit_image_index"] = 0
@@ -902,45 +1246,22 @@ def main() -> None:
                 
                 with col_dl1:
                     # JSON 다운로드
-                    payload = json.dumps(edit_records, ensure_ascii=False, indent=2)
                     st.download_button(
                         label="JSON 다운로드",
-                        data=payload.encode("utf-8"),
-                        file_name=f"dress_results_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
+                        data=build_json_buffer(edit_records),
+                        file_name=f"dress_results_{get_export_timestamp()}.json",
                         mime="application/json",
                         use_container_width=True,
                     )
                 
                 with col_dl2:
                     # CSV 다운로드
-                    csv_data = []
-                    for r in edit_records:
-                        schema = r.get("schema", {}) or {}
-                        csv_row = {
-                            "id": r.get("id"),
-                            "created_at": r.get("created_at"),
-                            "image_name": r.get("image_name"),
-                            "original_name": r.get("original_name", ""),
-                            "prompt": r.get("prompt"),
-                            "name": schema.get("name"),
-                            "line": json.dumps(schema.get("line", []), ensure_ascii=False, separators=(',', ':')),
-                            "material": json.dumps(schema.get("material", []), ensure_ascii=False, separators=(',', ':')),
-                            "color": schema.get("color"),
-                            "neckline": json.dumps(schema.get("neckline", []), ensure_ascii=False, separators=(',', ':')),
-                            "sleeve": json.dumps(schema.get("sleeve", []), ensure_ascii=False, separators=(',', ':')),
-                            "keyword": json.dumps(schema.get("keyword", []), ensure_ascii=False, separators=(',', ':')),
-                            "detail": json.dumps(schema.get("detail", []), ensure_ascii=False, separators=(',', ':')),
-                            "dress_lengths": json.dumps(schema.get("dress_lengths", []), ensure_ascii=False, separators=(',', ':')),
-                        }
-                        csv_data.append(csv_row)
-                    
-                    csv_df = pd.DataFrame(csv_data)
-                    csv_content = csv_df.to_csv(index=False, encoding='utf-8-sig')
+                    csv_content = build_csv_buffer(edit_records)
                     
                     st.download_button(
                         label="CSV 다운로드 (Supabase용)",
-                        data=csv_content.encode('utf-8-sig'),
-                        file_name=f"dress_results_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv",
+                        data=csv_content,
+                        file_name=f"dress_results_{get_export_timestamp()}.csv",
                         mime="text/csv",
                         use_container_width=True,
                     )
@@ -955,38 +1276,28 @@ def main() -> None:
         st.divider()
     
     st.subheader("데이터 관리")
-    rows = load_store(store_path)
+    rows = load_store_tail(store_path, tail_size) if tail_size else load_store_cached(store_path)
     if not rows:
         st.info("저장된 데이터가 없습니다. 이미지를 업로드하여 분석해 보세요.")
         return
+    id_index = build_id_index(rows)
+
+    def get_full_rows() -> List[Dict[str, Any]]:
+        # 최근 항목만 표시 중이면 작업 시점에만 전체 데이터를 로드
+        return load_store_cached(store_path) if tail_size else rows
+
+    def get_full_index() -> Dict[str, Dict[str, Any]]:
+        return build_id_index(get_full_rows()) if tail_size else id_index
+
+    # 플랫 DataFrame은 표시와 행 선택 표에서 함께 사용
+    flat_df = build_flat_dataframe(rows) if tail_size else load_flat_view(store_path, rows)
 
     # 테이블 렌더링
     if view_mode == "플랫":
-        flat_rows = [flatten_record(r) for r in rows]
-        df = pd.DataFrame(flat_rows)
+        df = flat_df
     elif view_mode == "CSV":
         # CSV 모드에서는 Supabase 업로드용 형식으로 변환
-        csv_rows = []
-        for r in rows:
-            schema = r.get("schema", {}) or {}
-            csv_row = {
-                "id": r.get("id"),
-                "created_at": r.get("created_at"),
-                "image_name": r.get("image_name"),
-                "original_name": r.get("original_name", ""),
-                "prompt": r.get("prompt"),
-                "name": schema.get("name"),
-                "line": json.dumps(schema.get("line", []), ensure_ascii=False, separators=(',', ':')),
-                "material": json.dumps(schema.get("material", []), ensure_ascii=False, separators=(',', ':')),
-                "color": schema.get("color"),
-                "neckline": json.dumps(schema.get("neckline", []), ensure_ascii=False, separators=(',', ':')),
-                "sleeve": json.dumps(schema.get("sleeve", []), ensure_ascii=False, separators=(',', ':')),
-                "keyword": json.dumps(schema.get("keyword", []), ensure_ascii=False, separators=(',', ':')),
-                "detail": json.dumps(schema.get("detail", []), ensure_ascii=False, separators=(',', ':')),
-                "dress_lengths": json.dumps(schema.get("dress_lengths", []), ensure_ascii=False, separators=(',', ':')),
-            }
-            csv_rows.append(csv_row)
-        df = pd.DataFrame(csv_rows)
+        df = pd.DataFrame([to_csv_values(r) for r in rows], columns=CSV_COLUMNS)
     else:
         # 원본 JSON 모드에서는 문자열로 표시
         df = pd.DataFrame(
@@ -995,7 +1306,7 @@ def main() -> None:
                     "id": r.get("id"),
                     "created_at": r.get("created_at"),
                     "image_name": r.get("image_name"),
-                    "json": json.dumps(r, ensure_ascii=False),
+                    "json": orjson.dumps(r).decode("utf-8"),
                 }
                 for r in rows
             ]
@@ -1009,170 +1320,59 @@ def main() -> None:
     st.subheader("데이터 표")
     st.dataframe(df, use_container_width=True)
     
-    st.subheader("데이터 선택 및 관리")
-    
-    # 전체 선택/해제 버튼
-    col_select_all, col_clear_all = st.columns(2)
-    with col_select_all:
-        if st.button("전체 선택"):
-            # 모든 행의 ID를 선택 상태로 설정
-            all_ids = set(str(row.get("id")) for row in rows)
-            st.session_state["selected_rows"] = all_ids
-            # 체크박스 key들을 초기화하여 새로고침 시 반영되도록 함
-            for row in rows:
-                row_id = str(row.get("id"))
-                checkbox_key = f"checkbox_{row_id}"
-                if checkbox_key in st.session_state:
-                    del st.session_state[checkbox_key]
-            st.rerun()
-    with col_clear_all:
-        if st.button("전체 해제"):
-            # 모든 선택 해제
-            st.session_state["selected_rows"] = set()
-            # 체크박스 key들을 초기화하여 새로고침 시 반영되도록 함
-            for row in rows:
-                row_id = str(row.get("id"))
-                checkbox_key = f"checkbox_{row_id}"
-                if checkbox_key in st.session_state:
-                    del st.session_state[checkbox_key]
-            st.rerun()
-    
-    # 각 행에 체크박스 추가 (간단한 리스트 형태)
-    selected_ids = []
-    for i, row in enumerate(rows):
-        row_id = str(row.get("id"))
-        is_selected = row_id in st.session_state["selected_rows"]
-        
-        col1, col2 = st.columns([0.1, 0.9])
-        with col1:
-            # 체크박스의 현재 상태 (세션 상태와 동기화)
-            checkbox_key = f"checkbox_{row_id}"
-            checkbox_is_checked = st.checkbox("선택", value=is_selected, key=checkbox_key, label_visibility="collapsed")
-            
-            # 체크박스 상태에 따라 세션 상태 업데이트
-            if checkbox_is_checked:
-                st.session_state["selected_rows"].add(row_id)
-                selected_ids.append(row_id)
-            else:
-                st.session_state["selected_rows"].discard(row_id)
-        
-        with col2:
-            if view_mode == "플랫":
-                flat_row = flatten_record(row)
-                st.write(f"**ID:** {flat_row.get('id')} | **파일:** {flat_row.get('image_name')} | **이름:** {flat_row.get('name')}")
-            elif view_mode == "CSV":
-                schema = row.get("schema", {}) or {}
-                st.write(f"**ID:** {row.get('id')} | **파일:** {row.get('image_name')} | **이름:** {schema.get('name')}")
-            else:
-                st.write(f"**ID:** {row.get('id')} | **파일:** {row.get('image_name')}")
-    
-    st.markdown("---")
-    st.subheader("선택된 데이터 작업")
-    
-    # 선택된 항목 표시
-    if st.session_state["selected_rows"]:
-        st.info(f"선택된 항목: {len(st.session_state['selected_rows'])}개")
-        selected_ids_str = ",".join(st.session_state["selected_rows"])
-    else:
-        st.warning("선택된 항목이 없습니다.")
-        selected_ids_str = ""
-    
-    # 기존 수동 입력 방식도 유지
-    manual_ids = st.text_input(
-        "또는 수동으로 id 입력 (쉼표로 구분)",
-        value=selected_ids_str,
-        help="체크박스 선택과 수동 입력을 함께 사용할 수 있습니다.",
-    )
-
-    def filter_rows_by_ids(all_rows: List[Dict[str, Any]], ids_text: str) -> List[Dict[str, Any]]:
-        ids = [s.strip() for s in ids_text.split(",") if s.strip()] if ids_text else []
-        if not ids:
-            return all_rows
-        id_set = set(ids)
-        return [r for r in all_rows if str(r.get("id")) in id_set]
-
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        if st.button("클립보드로 복사 (플랫 텍스트)"):
-            target_rows = filter_rows_by_ids(rows, manual_ids)
+    def run_selection_action(action: str, parsed_ids: List[str]) -> None:
+        if action == "선택 삭제":
+            # fragment 재실행 시 클로저의 행 목록은 마지막 전체 실행 시점 것이므로
+            # 그 이후 추가된 레코드(다른 세션 포함)를 잃지 않도록 저장 파일을 다시 읽어 사용
+            all_rows = load_store(store_path)
+            target_rows = filter_rows_by_ids(build_id_index(all_rows), parsed_ids)
             if target_rows:
+                target_ids = {str(r.get("id")) for r in target_rows}
+                remaining = [r for r in all_rows if str(r.get("id")) not in target_ids]
+                overwrite_store(store_path, remaining)
+                st.session_state.pop("export_ts", None)
+                _load_store_cached.clear()
+                # 선택 상태 초기화
+                st.session_state["selected_rows"] = set()
+                reset_row_selector()
+                # fragment 밖의 표와 이 함수가 참조하는 행 목록도 갱신되도록 전체를 다시 실행
+                st.session_state["selection_notice"] = f"{len(target_rows)}개 항목이 삭제되었습니다."
+                st.rerun()
+            else:
+                st.warning("삭제할 항목이 없습니다.")
+        else:
+            target_rows = filter_rows_by_ids(get_full_index(), parsed_ids)
+            if not target_rows:
+                st.warning("선택된 항목이 없습니다.")
+            elif action == "클립보드로 복사 (플랫 텍스트)":
                 flat_text = "\n\n".join(
                     [
-                        (flatten_record(r).get("prompt") or "")
-                        + "\n" + json.dumps(r.get("schema", {}), ensure_ascii=False)
+                        (r.get("prompt") or "")
+                        + "\n" + orjson.dumps(r.get("schema", {})).decode("utf-8")
                         for r in target_rows
                     ]
                 )
                 st.code(flat_text, language="text")
                 st.info("위 블록을 복사하세요.")
-            else:
-                st.warning("선택된 항목이 없습니다.")
-
-    with col2:
-        if st.button("JSON 다운로드"):
-            target_rows = filter_rows_by_ids(rows, manual_ids)
-            if target_rows:
-                payload = json.dumps(target_rows, ensure_ascii=False, indent=2)
+            elif action == "JSON 다운로드":
                 st.download_button(
                     label="다운로드 시작",
-                    data=payload.encode("utf-8"),
-                    file_name=f"dress_results_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
+                    data=build_json_buffer(target_rows),
+                    file_name=f"dress_results_{get_export_timestamp()}.json",
                     mime="application/json",
                 )
             else:
-                st.warning("선택된 항목이 없습니다.")
-
-    with col3:
-        if st.button("CSV 다운로드 (Supabase용)"):
-            target_rows = filter_rows_by_ids(rows, manual_ids)
-            if target_rows:
                 # Supabase 업로드용 CSV 형식으로 변환
-                csv_data = []
-                for r in target_rows:
-                    schema = r.get("schema", {}) or {}
-                    csv_row = {
-                        "id": r.get("id"),
-                        "created_at": r.get("created_at"),
-                        "image_name": r.get("image_name"),
-                        "original_name": r.get("original_name", ""),
-                        "prompt": r.get("prompt"),
-                        "name": schema.get("name"),
-                        "line": json.dumps(schema.get("line", []), ensure_ascii=False, separators=(',', ':')),
-                        "material": json.dumps(schema.get("material", []), ensure_ascii=False, separators=(',', ':')),
-                        "color": schema.get("color"),
-                        "neckline": json.dumps(schema.get("neckline", []), ensure_ascii=False, separators=(',', ':')),
-                        "sleeve": json.dumps(schema.get("sleeve", []), ensure_ascii=False, separators=(',', ':')),
-                        "keyword": json.dumps(schema.get("keyword", []), ensure_ascii=False, separators=(',', ':')),
-                        "detail": json.dumps(schema.get("detail", []), ensure_ascii=False, separators=(',', ':')),
-                        "dress_lengths": json.dumps(schema.get("dress_lengths", []), ensure_ascii=False, separators=(',', ':')),
-                    }
-                    csv_data.append(csv_row)
-                
-                csv_df = pd.DataFrame(csv_data)
-                csv_content = csv_df.to_csv(index=False, encoding='utf-8-sig')
-                
                 st.download_button(
                     label="CSV 다운로드",
-                    data=csv_content.encode('utf-8-sig'),
-                    file_name=f"dress_results_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv",
+                    data=build_csv_buffer(target_rows),
+                    file_name=f"dress_results_{get_export_timestamp()}.csv",
                     mime="text/csv",
                 )
-            else:
-                st.warning("선택된 항목이 없습니다.")
 
-    with col4:
-        if st.button("선택 삭제", type="primary"):
-            target_rows = filter_rows_by_ids(rows, manual_ids)
-            if target_rows:
-                target_ids = {str(r.get("id")) for r in target_rows}
-                remaining = [r for r in rows if str(r.get("id")) not in target_ids]
-                overwrite_store(store_path, remaining)
-                # 선택 상태 초기화
-                st.session_state["selected_rows"] = set()
-                st.success(f"{len(target_rows)}개 항목이 삭제되었습니다. 페이지를 새로고침하거나 아래 '새로고침'을 눌러 반영하세요.")
-            else:
-                st.warning("삭제할 항목이 없습니다.")
+    st.subheader("데이터 선택 및 관리")
+    
+    render_selection_panel(flat_df, run_selection_action)
 
     if st.button("새로고침"):
         st.rerun()
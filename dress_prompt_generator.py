@@ -5,17 +5,419 @@ Dress Image Prompt Generator
 """
 
 import os
+import re
+import asyncio
 import sys
-import json
 import base64
+import tempfile
+import hashlib
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Any
-import anthropic
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional
+import orjson
 from dotenv import load_dotenv
 
+# anthropic, PIL은 import 비용이 커서 실제로 사용할 때 불러옴 (--help, 모듈 import만 하는 경우 빠르게)
+if TYPE_CHECKING:
+    import anthropic
+
 # .env 파일에서 환경변수 로드
 load_dotenv()
 
+# id 형식 검증/정규화용 정규식 (영문, 숫자, 언더스코어, 하이픈)
+_ID_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_ID_NORM_RE = re.compile(r'[^a-zA-Z0-9_-]')
+
+# 응답의 마크다운 코드블록에서 JSON 본문 추출 (닫는 ``` 가 없는 경우도 허용)
+_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*\})\s*(?:```|$)', re.DOTALL)
+
+# 누락된 배열 필드의 기본값 (호출마다 빈 리스트를 새로 만들지 않도록 공유)
+_EMPTY: tuple = ()
+
+# 결과 JSON 저장/출력 옵션 (orjson은 비ASCII 문자를 이스케이프하지 않음)
+_JSON_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# 파일 확장자 -> media type 매핑 (읽기 전용)
+_MEDIA_TYPE_MAP = MappingProxyType({
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp"
+})
+
+# 드레스 이미지 분석 프롬프트 (모든 요청에서 동일)
+_ANALYSIS_PROMPT = """이 드레스 이미지를 상세히 분석하여 record_dress_analysis 도구로 스키마를 기록하세요.
+prompt는 빈 문자열로 두세요.
+
+중요 규칙 (반드시 지켜야 함):
+- 배열 필드는 도구 스키마의 enum에 있는 한국어 값만, 정확히 같은 단어와 띄어쓰기로 사용하세요. 의미 중복은 피하세요.
+- id: name과 동일한 규칙으로 영문으로 작성하세요. 파일명으로 사용되므로 공백은 언더스코어(_)로, 특수문자는 피하세요.
+  예시: name이 "A라인_비즈_새틴 드레스"이면 id는 "a-line_bead_satin"
+- name 형식은 반드시 "라인_소재 드레스" 또는 "라인_디테일_소재 드레스"로 작성하세요.
+  디테일이 있을 경우 대표적인 디테일 1개만 사용하세요. 예시: "A라인_비즈_새틴 드레스", "시스_새틴 드레스"
+- color는 한국어 단일 문자열로 작성하세요. 예: "화이트", "아이보리", "블러쉬".
+- 개수 제한: dress_lengths는 정확히 1개, keyword는 1~3개만 선택하세요.
+"""
+
+# 시스템 프롬프트 블록 (모든 요청에서 동일하므로 프롬프트 캐싱 적용)
+_SYSTEM_BLOCKS = [
+    {
+        "type": "text",
+        "text": _ANALYSIS_PROMPT,
+        "cache_control": {"type": "ephemeral"},
+    }
+]
+
+# 이미지와 함께 보내는 사용자 메시지
+_USER_INSTRUCTION = "이 드레스 이미지를 분석하여 결과를 기록하세요."
+
+# 정규화 후에도 스키마가 규칙을 위반할 때 재요청하는 최대 횟수
+MAX_SCHEMA_RETRIES = 2
+
+# Message Batches API 결과 확인 간격 (초)
+BATCH_POLL_INTERVAL = 30
+
+# 배치 제출 전 이미지 인코딩에 사용하는 스레드 수
+BATCH_PREPARE_WORKERS = 4
+
+# 배치 하나에 담을 최대 요청 수와 base64 이미지 데이터 총량
+# (API 한도인 100,000개 / 256MB보다 여유 있게 잡아 요청 본문의 나머지 부분도 수용)
+BATCH_MAX_REQUESTS = 10_000
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+# 분석 결과 디스크 캐시 기본 경로 (환경변수 DRESS_CACHE로 변경 가능)
+_DEFAULT_CACHE_DIR = "~/.cache/dress_prompt_generator"
+
+# 캐시 키에 포함할 프롬프트 해시 (프롬프트가 바뀌면 이전 캐시는 사용하지 않음)
+_ANALYSIS_PROMPT_HASH = hashlib.sha256(_ANALYSIS_PROMPT.encode("utf-8")).digest()
+
+# API 전송 전 이미지 최대 픽셀 수 (Anthropic 권장 약 1.3MP) 및 재인코딩 WebP 품질/압축 수준
+MAX_IMAGE_PIXELS = 1_300_000
+WEBP_QUALITY = 82
+WEBP_METHOD = 4
+
+# 이 비율 이상으로 줄일 때만 LANCZOS 사용 (그 미만은 BICUBIC)
+LANCZOS_MIN_RATIO = 3.0
+
+
+class EncodedImage(NamedTuple):
+    """API 전송용으로 인코딩된 이미지 (불변, 튜플처럼 언패킹 가능)"""
+
+    data: str
+    media_type: str
+
+
+# 인코딩 결과 메모이즈에 사용할 최대 메모리 (base64 문자 수 기준)
+# 이 한도의 1/4을 넘는 결과는 다른 항목을 밀어내지 않도록 메모이즈하지 않음
+ENCODE_MEMO_MAX_BYTES = 32 * 1024 * 1024
+
+# base64 스트리밍 인코딩 청크 크기 (3의 배수여야 마지막 청크 외에는 패딩이 생기지 않음)
+_B64_CHUNK_SIZE = 57 * 4096
+
+
+def _b64encode_stream(stream: BinaryIO, size: int) -> str:
+    """
+    바이너리 스트림을 청크 단위로 읽어 미리 할당한 버퍼에 base64 인코딩
+    (원본 전체 바이트와 인코딩 결과를 동시에 메모리에 올리지 않음)
+
+    Args:
+        stream: 읽을 바이너리 스트림 (현재 위치부터 끝까지 인코딩)
+        size: 스트림에서 읽을 전체 바이트 수 (버퍼 크기 계산용)
+
+    Returns:
+        base64 인코딩 문자열
+    """
+    out = bytearray(4 * ((size + 2) // 3))
+    pos = 0
+    while chunk := stream.read(_B64_CHUNK_SIZE):
+        encoded = base64.standard_b64encode(chunk)
+        out[pos:pos + len(encoded)] = encoded
+        pos += len(encoded)
+
+    if pos != len(out):
+        del out[pos:]
+    return out.decode("ascii")
+
+
+def _downscale_image(stream: BinaryIO) -> Optional[bytes]:
+    """
+    큰 이미지를 약 1.3MP로 축소하고 WebP로 재인코딩 (비율 유지)
+
+    Args:
+        stream: 원본 이미지 바이너리 스트림
+
+    Returns:
+        재인코딩된 WebP 바이트 (이미 충분히 작으면 None)
+    """
+    from PIL import ExifTags, Image, ImageOps
+
+    with Image.open(stream) as img:
+        width, height = img.size
+        if width * height <= MAX_IMAGE_PIXELS:
+            return None
+
+        scale = (MAX_IMAGE_PIXELS / (width * height)) ** 0.5
+        new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+        # JPEG는 libjpeg의 축소 디코드(1/2, 1/4, 1/8)로 목표 크기 이상까지만 디코드
+        if img.format == "JPEG":
+            img.draft("RGB", new_size)
+
+        # 재인코딩하면 EXIF 회전 정보가 사라지므로 휴대폰 사진 등은 축소 전에 픽셀을 바로 세움
+        source = img
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+        if orientation != 1:
+            source = ImageOps.exif_transpose(img)
+            if orientation in (5, 6, 7, 8):
+                # 90/270도 회전이면 가로세로가 바뀜
+                new_size = (new_size[1], new_size[0])
+
+        # 축소 비율이 작으면 BICUBIC으로도 화질 차이가 없으므로 더 비싼 LANCZOS는 큰 축소에만 사용
+        ratio = source.size[0] / new_size[0]
+        resample = Image.LANCZOS if ratio >= LANCZOS_MIN_RATIO else Image.BICUBIC
+        resized = source.resize(new_size, resample)
+
+    # 투명 배경은 모델이 검게 인식할 수 있으므로 흰 배경에 합성
+    if resized.mode in ("RGBA", "LA") or (resized.mode == "P" and "transparency" in resized.info):
+        rgba = resized.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        resized = background
+    elif resized.mode != "RGB":
+        resized = resized.convert("RGB")
+
+    buffer = BytesIO()
+    resized.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=WEBP_METHOD)
+    return buffer.getvalue()
+
+
+def _sniff_media_type(header: bytes) -> Optional[str]:
+    """
+    파일 앞부분의 매직 바이트로 이미지 media type 판별
+
+    Args:
+        header: 파일 앞부분 바이트 (12바이트 이상 권장)
+
+    Returns:
+        media type (알 수 없는 형식이면 None)
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _verify_image(stream: BinaryIO) -> None:
+    """
+    원본 그대로 전송할 이미지가 손상되지 않았는지 확인 (구조 검사 후 전체 디코드)
+
+    Args:
+        stream: 원본 이미지 바이너리 스트림 (처음 위치에서 시작)
+
+    Raises:
+        OSError, SyntaxError: 손상되었거나 잘린 이미지인 경우
+    """
+    from PIL import Image
+
+    with Image.open(stream) as img:
+        img.verify()
+
+    # verify() 후에는 같은 객체로 디코드할 수 없고 JPEG은 verify()가 잘림을 검사하지 않으므로 다시 열어 디코드
+    stream.seek(0)
+    with Image.open(stream) as img:
+        img.load()
+
+
+def _encode_stream(stream: BinaryIO, size: int, image_path: str) -> EncodedImage:
+    """
+    이미지 스트림을 base64로 인코딩하고 media type을 결정
+
+    Args:
+        stream: 원본 이미지 바이너리 스트림 (처음 위치에서 시작)
+        size: 원본 이미지 크기 (bytes)
+        image_path: 시그니처로 형식을 알 수 없을 때 media type 판별에 사용할 파일 경로 (확장자만 사용)
+
+    Returns:
+        EncodedImage (base64_encoded_data, media_type)
+
+    Raises:
+        ValueError: 비어 있거나 손상되었거나 이미지로 인식할 수 없는 경우 (API 호출 전에 실패)
+    """
+    from PIL import UnidentifiedImageError
+
+    if size == 0:
+        raise ValueError(f"이미지 파일이 비어 있습니다: {image_path}")
+
+    # 파일 시그니처로 실제 형식 판별 (확장자가 잘못된 파일도 올바른 media type으로 전송)
+    media_type = _sniff_media_type(stream.read(12))
+    stream.seek(0)
+
+    # 큰 이미지는 축소 후 WebP로 전송 (업로드 크기와 비전 토큰 절감)
+    # 손상되거나 잘린 파일은 축소(디코드) 또는 검증 단계에서 걸러 API 요청 비용을 쓰지 않음
+    try:
+        downscaled = _downscale_image(stream)
+        if downscaled is None:
+            stream.seek(0)
+            _verify_image(stream)
+    except UnidentifiedImageError:
+        raise ValueError(f"이미지 형식을 인식할 수 없습니다: {image_path}") from None
+    except (OSError, SyntaxError) as e:
+        raise ValueError(f"손상된 이미지 파일입니다: {image_path} ({e})") from None
+    if downscaled is not None:
+        return EncodedImage(_b64encode_stream(BytesIO(downscaled), len(downscaled)), "image/webp")
+
+    # 축소하지 않는 경우 원본을 처음부터 다시 읽어 인코딩
+    stream.seek(0)
+    image_data = _b64encode_stream(stream, size)
+
+    # 시그니처로 판별하지 못한 경우에만 파일 확장자에 따라 media type 결정
+    if media_type is None:
+        extension = Path(image_path).suffix.lower()
+        media_type = _MEDIA_TYPE_MAP.get(extension, "image/png")
+
+    return EncodedImage(image_data, media_type)
+
+
+def _encode_raw(raw_data: bytes, image_path: str) -> EncodedImage:
+    """
+    메모리에 있는 이미지 바이트를 base64로 인코딩하고 media type을 결정
+
+    Args:
+        raw_data: 원본 이미지 바이트
+        image_path: media type 판별에 사용할 파일 경로 (확장자만 사용)
+
+    Returns:
+        EncodedImage (base64_encoded_data, media_type)
+    """
+    return _encode_stream(BytesIO(raw_data), len(raw_data), image_path)
+
+
+def _stat_image(image_path: str) -> os.stat_result:
+    """
+    이미지 파일 stat 조회 (존재 확인과 캐시 키 계산을 한 번의 시스템 콜로 처리)
+
+    Args:
+        image_path: 이미지 파일 경로
+
+    Returns:
+        os.stat 결과
+
+    Raises:
+        FileNotFoundError: 파일이 없는 경우
+        ValueError: 빈 파일인 경우
+    """
+    try:
+        stat = os.stat(image_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}") from None
+    if stat.st_size == 0:
+        raise ValueError(f"이미지 파일이 비어 있습니다: {image_path}")
+    return stat
+
+
+_encode_memo: "OrderedDict[tuple, EncodedImage]" = OrderedDict()
+_encode_memo_bytes = 0
+_encode_memo_lock = threading.Lock()
+
+
+def _encode_image_cached(path: str, mtime_ns: int, size: int) -> EncodedImage:
+    """
+    파일 경로 기준으로 base64 인코딩 결과를 메모이즈 (총 크기를 ENCODE_MEMO_MAX_BYTES로 제한하는 LRU)
+    (mtime_ns는 파일이 바뀌면 캐시가 무효화되도록 키에만 사용)
+
+    Args:
+        path: 이미지 파일 경로
+        mtime_ns: 파일 수정 시각 (ns)
+        size: 파일 크기 (bytes)
+
+    Returns:
+        EncodedImage (base64_encoded_data, media_type)
+    """
+    global _encode_memo_bytes
+
+    key = (path, mtime_ns, size)
+    with _encode_memo_lock:
+        image = _encode_memo.get(key)
+        if image is not None:
+            _encode_memo.move_to_end(key)
+            return image
+
+    # 파일 전체를 한 번에 읽지 않고 스트림으로 인코딩
+    with open(path, "rb") as image_file:
+        image = _encode_stream(image_file, size, path)
+
+    cost = len(image.data)
+    if cost <= ENCODE_MEMO_MAX_BYTES // 4:
+        with _encode_memo_lock:
+            if key not in _encode_memo:
+                _encode_memo[key] = image
+                _encode_memo_bytes += cost
+            # 한도를 넘으면 가장 오래 쓰지 않은 결과부터 제거
+            while _encode_memo_bytes > ENCODE_MEMO_MAX_BYTES:
+                _, evicted = _encode_memo.popitem(last=False)
+                _encode_memo_bytes -= len(evicted.data)
+    return image
+
+
+@functools.lru_cache(maxsize=128)
+def _file_sha256_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    파일 내용의 sha256 다이제스트를 메모이즈
+    (mtime_ns, size는 파일이 바뀌면 캐시가 무효화되도록 키에만 사용)
+
+    Args:
+        path: 파일 경로
+        mtime_ns: 파일 수정 시각 (ns)
+        size: 파일 크기 (bytes)
+
+    Returns:
+        sha256 다이제스트 바이트
+    """
+    with open(path, "rb") as f:
+        # Python 3.11+: 내부 버퍼에 readinto로 읽어 청크마다 bytes를 새로 만들지 않음
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").digest()
+
+        digest = hashlib.sha256()
+        while chunk := f.read(_B64_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.digest()
+
+
+def _bounded_map(executor: ThreadPoolExecutor, fn: Callable[[Any], Any], items: Iterable[Any], window: int) -> Iterator[Any]:
+    """
+    executor.map처럼 입력 순서대로 결과를 내되, 동시에 제출해 두는 작업 수를 window개로 제한
+    (executor.map은 모든 작업을 한 번에 제출하므로 소비하지 않은 결과가 전부 메모리에 쌓임)
+
+    Args:
+        executor: 작업을 실행할 스레드 풀
+        fn: 각 항목에 적용할 함수
+        items: 입력 항목
+        window: 동시에 제출해 둘 최대 작업 수
+
+    Returns:
+        입력 순서대로의 결과 이터레이터
+    """
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
 
 class DressPromptGenerator:
     """드레스 이미지 분석 및 프롬프트 생성 클래스"""
@@ -28,6 +430,66 @@ class DressPromptGenerator:
     ALLOWED_KEYWORDS = ["럭셔리", "드라마틱", "클래식", "우아한", "로맨틱", "빈티지", "모던", "미니멀", "귀여운", "볼륨", "포멀", "로얄", "시크", "도시적인"]
     ALLOWED_DETAILS = ["비즈", "시퀸", "긴 트레인", "드레이핑", "코르셋", "일루전 백", "아플리케 레이스", "리본", "러플", "레이어드 스커트", "플리츠"]
     ALLOWED_DRESS_LENGTHS = ["종아리 길이", "발목 길이", "스윕 트레인(바닥 닿는 길이)", "채플 트레인(뒤가 약간 끌림)", "캐시드럴 트레인(뒤가 길게 끌림)", "미니", "무릎 길이"]
+
+    # 멤버십 검사용 집합 (리스트는 오류 메시지 출력용으로 유지)
+    _ALLOWED_LINES_SET = frozenset(ALLOWED_LINES)
+    _ALLOWED_MATERIALS_SET = frozenset(ALLOWED_MATERIALS)
+    _ALLOWED_NECKLINES_SET = frozenset(ALLOWED_NECKLINES)
+    _ALLOWED_SLEEVES_SET = frozenset(ALLOWED_SLEEVES)
+    _ALLOWED_KEYWORDS_SET = frozenset(ALLOWED_KEYWORDS)
+    _ALLOWED_DETAILS_SET = frozenset(ALLOWED_DETAILS)
+    _ALLOWED_DRESS_LENGTHS_SET = frozenset(ALLOWED_DRESS_LENGTHS)
+
+    # 배열 필드 -> 허용 어휘 집합 (검증/정규화 루프용)
+    _FIELD_ALLOWED: Dict[str, frozenset] = {
+        "line": _ALLOWED_LINES_SET,
+        "material": _ALLOWED_MATERIALS_SET,
+        "neckline": _ALLOWED_NECKLINES_SET,
+        "sleeve": _ALLOWED_SLEEVES_SET,
+        "keyword": _ALLOWED_KEYWORDS_SET,
+        "detail": _ALLOWED_DETAILS_SET,
+        "dress_lengths": _ALLOWED_DRESS_LENGTHS_SET,
+    }
+
+    # 배열 필드 -> 허용 어휘 리스트 (오류 메시지 출력용)
+    _FIELD_ALLOWED_LIST: Dict[str, List[str]] = {
+        "line": ALLOWED_LINES,
+        "material": ALLOWED_MATERIALS,
+        "neckline": ALLOWED_NECKLINES,
+        "sleeve": ALLOWED_SLEEVES,
+        "keyword": ALLOWED_KEYWORDS,
+        "detail": ALLOWED_DETAILS,
+        "dress_lengths": ALLOWED_DRESS_LENGTHS,
+    }
+
+    # 구조화 출력용 도구 정의 (허용 어휘를 enum으로 지정해 응답 형식을 강제)
+    _SCHEMA_TOOL: Dict[str, Any] = {
+        "name": "record_dress_analysis",
+        "description": "드레스 이미지 분석 결과(프롬프트와 스키마)를 기록합니다.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "prompt": {"type": "string"},
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "pattern": "^[a-zA-Z0-9_-]+$"},
+                        "name": {"type": "string"},
+                        "line": {"type": "array", "items": {"type": "string", "enum": ALLOWED_LINES}},
+                        "material": {"type": "array", "items": {"type": "string", "enum": ALLOWED_MATERIALS}},
+                        "color": {"type": "string"},
+                        "neckline": {"type": "array", "items": {"type": "string", "enum": ALLOWED_NECKLINES}},
+                        "sleeve": {"type": "array", "items": {"type": "string", "enum": ALLOWED_SLEEVES}},
+                        "keyword": {"type": "array", "items": {"type": "string", "enum": ALLOWED_KEYWORDS}, "minItems": 1, "maxItems": 3},
+                        "detail": {"type": "array", "items": {"type": "string", "enum": ALLOWED_DETAILS}},
+                        "dress_lengths": {"type": "array", "items": {"type": "string", "enum": ALLOWED_DRESS_LENGTHS}, "minItems": 1, "maxItems": 1},
+                    },
+                    "required": ["id", "name", "line", "material", "color", "neckline", "sleeve", "keyword", "detail", "dress_lengths"],
+                },
+            },
+            "required": ["prompt", "schema"],
+        },
+    }
     
     # 한국어 -> 영문 변환 맵 (ID 생성용)
     KOREAN_TO_ENGLISH = {
@@ -109,12 +571,17 @@ class DressPromptGenerator:
         "무릎 길이": "knee-length",
     }
 
-    def __init__(self, api_key: str = None):
+    # API 키별로 공유하는 동기 클라이언트 (인스턴스가 여러 개여도 커넥션 풀 재사용)
+    _client_cache: Dict[str, "anthropic.Anthropic"] = {}
+    _client_lock = threading.Lock()
+
+    def __init__(self, api_key: str = None, use_cache: bool = True):
         """
         초기화
 
         Args:
             api_key: Anthropic API 키 (None일 경우 환경변수에서 로드)
+            use_cache: 같은 이미지의 분석 결과를 디스크 캐시에서 재사용할지 여부
         """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
@@ -123,12 +590,60 @@ class DressPromptGenerator:
                 ".env 파일을 생성하거나 환경변수로 설정해주세요."
             )
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = self._get_shared_client(self.api_key)
+        # 여러 이미지를 동시에 분석할 때 사용하는 비동기 클라이언트 (처음 사용할 때 생성)
+        self._async_client: Optional["anthropic.AsyncAnthropic"] = None
         # 모델명을 환경변수로 설정 가능하게 하고, 기본값을 Claude Haiku 4.5로 지정
         # 참고: 환경변수 ANTHROPIC_MODEL이 설정되어 있으면 이를 우선 사용합니다.
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-haiku-4-5-20251001")
 
-    def encode_image(self, image_path: str) -> tuple[str, str]:
+        # 분석 결과 디스크 캐시 (이미지 내용 + 모델 + 프롬프트 기준)
+        self.use_cache = use_cache
+        self._cache_dir = Path(os.getenv("DRESS_CACHE", _DEFAULT_CACHE_DIR)).expanduser()
+        if self.use_cache:
+            try:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                # 캐시는 최적화일 뿐이므로 디렉토리를 만들 수 없으면 캐시 없이 동작
+                print(f"경고: 캐시 디렉토리를 사용할 수 없어 캐시를 끕니다 ({e})")
+                self.use_cache = False
+
+    @classmethod
+    def _get_shared_client(cls, api_key: str) -> "anthropic.Anthropic":
+        """
+        API 키별 공유 동기 클라이언트 조회 (없으면 생성)
+
+        Args:
+            api_key: Anthropic API 키
+
+        Returns:
+            anthropic.Anthropic 클라이언트
+        """
+        with cls._client_lock:
+            client = cls._client_cache.get(api_key)
+            if client is None:
+                import anthropic
+
+                client = anthropic.Anthropic(api_key=api_key)
+                cls._client_cache[api_key] = client
+            return client
+
+    @property
+    def async_client(self) -> "anthropic.AsyncAnthropic":
+        """
+        비동기 클라이언트 (비동기 분석을 처음 호출할 때 생성)
+        이벤트 루프에 묶인 커넥션 풀을 가지므로 클래스 단위로 공유하지 않음
+
+        Returns:
+            anthropic.AsyncAnthropic 클라이언트
+        """
+        if self._async_client is None:
+            import anthropic
+
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        return self._async_client
+
+    def encode_image(self, image_path: str) -> EncodedImage:
         """
         이미지를 base64로 인코딩
 
@@ -136,103 +651,119 @@ class DressPromptGenerator:
             image_path: 이미지 파일 경로
 
         Returns:
-            (base64_encoded_data, media_type) 튜플
+            EncodedImage (base64_encoded_data, media_type)
         """
-        with open(image_path, "rb") as image_file:
-            image_data = base64.standard_b64encode(image_file.read()).decode("utf-8")
+        stat = _stat_image(image_path)
+        return _encode_image_cached(str(image_path), stat.st_mtime_ns, stat.st_size)
 
-        # 파일 확장자에 따라 media type 결정
-        extension = Path(image_path).suffix.lower()
-        media_type_map = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp"
-        }
-        media_type = media_type_map.get(extension, "image/png")
+    def encode_image_bytes(self, raw_data: bytes, image_path: str) -> EncodedImage:
+        """
+        이미 메모리에 있는 이미지 바이트를 base64로 인코딩
 
-        return image_data, media_type
+        Args:
+            raw_data: 원본 이미지 바이트
+            image_path: media type 판별에 사용할 파일 경로 (파일명만 사용)
 
-    def validate_schema(self, schema: Dict[str, Any]) -> tuple[bool, List[str]]:
+        Returns:
+            EncodedImage (base64_encoded_data, media_type)
         """
-        스키마가 규칙에 맞는지 검증
+        return _encode_raw(raw_data, image_path)
+
+    def _iter_errors(self, schema: Dict[str, Any]) -> Iterator[str]:
+        """
+        스키마 규칙 위반 메시지를 하나씩 생성 (필요한 만큼만 검사)
 
         Args:
             schema: 검증할 스키마 딕셔너리
 
-        Returns:
-            (is_valid, errors) 튜플 - is_valid는 규칙 준수 여부, errors는 오류 메시지 리스트
+        Yields:
+            오류 메시지
         """
-        import re
-        errors: List[str] = []
-
         # id 검증: 영문 언더스코어 형식 (알파벳, 숫자, 언더스코어, 하이픈만 허용)
-        schema_id = schema.get("id", "")
+        schema_id = schema.get("id")
         if not schema_id:
-            errors.append("id 필드가 없습니다.")
-        elif not isinstance(schema_id, str):
-            errors.append(f"id는 문자열이어야 합니다. 현재: {type(schema_id)}")
+            yield "id 필드가 없습니다."
+        elif type(schema_id) is not str:
+            yield f"id는 문자열이어야 합니다. 현재: {type(schema_id)}"
         else:
-            if not re.match(r'^[a-zA-Z0-9_-]+$', schema_id):
-                errors.append(f"id는 영문, 숫자, 언더스코어(_), 하이픈(-)만 사용 가능합니다. 현재: {schema_id}")
+            if not _ID_RE.match(schema_id):
+                yield f"id는 영문, 숫자, 언더스코어(_), 하이픈(-)만 사용 가능합니다. 현재: {schema_id}"
 
         # name 검증: "라인_디테일(있을경우)_소재 드레스" 형식
-        name = schema.get("name", "")
+        name = schema.get("name")
         if not name:
-            errors.append("name 필드가 없습니다.")
-        elif not isinstance(name, str):
-            errors.append(f"name은 문자열이어야 합니다. 현재: {type(name)}")
+            yield "name 필드가 없습니다."
+        elif type(name) is not str:
+            yield f"name은 문자열이어야 합니다. 현재: {type(name)}"
         else:
             if not name.endswith(" 드레스"):
-                errors.append(f"name은 ' 드레스'로 끝나야 합니다. 현재: {name}")
+                yield f"name은 ' 드레스'로 끝나야 합니다. 현재: {name}"
             # 언더스코어로 구분되어 있는지 확인 (최소 2개: 라인_소재, 최대 3개: 라인_디테일_소재)
             parts = name.replace(" 드레스", "").split("_")
             if len(parts) < 2 or len(parts) > 3:
-                errors.append(f"name은 '라인_소재 드레스' 또는 '라인_디테일_소재 드레스' 형식이어야 합니다. 현재: {name}")
+                yield f"name은 '라인_소재 드레스' 또는 '라인_디테일_소재 드레스' 형식이어야 합니다. 현재: {name}"
 
         # color 검증: 문자열이고 비어있지 않아야 함
         color = schema.get("color", "")
-        if not isinstance(color, str):
-            errors.append(f"color는 문자열이어야 합니다. 현재: {type(color)}")
+        if type(color) is not str:
+            yield f"color는 문자열이어야 합니다. 현재: {type(color)}"
         elif not color:
-            errors.append("color는 비어있을 수 없습니다.")
+            yield "color는 비어있을 수 없습니다."
 
         # 배열 필드 검증: 허용 어휘 목록에 있는지 확인
-        array_fields = {
-            "line": (schema.get("line", []), self.ALLOWED_LINES),
-            "material": (schema.get("material", []), self.ALLOWED_MATERIALS),
-            "neckline": (schema.get("neckline", []), self.ALLOWED_NECKLINES),
-            "sleeve": (schema.get("sleeve", []), self.ALLOWED_SLEEVES),
-            "keyword": (schema.get("keyword", []), self.ALLOWED_KEYWORDS),
-            "detail": (schema.get("detail", []), self.ALLOWED_DETAILS),
-            "dress_lengths": (schema.get("dress_lengths", []), self.ALLOWED_DRESS_LENGTHS),
-        }
-
-        for field_name, (values, allowed_list) in array_fields.items():
-            if not isinstance(values, list):
-                errors.append(f"{field_name}는 리스트여야 합니다. 현재: {type(values)}")
+        for field_name, allowed_set in self._FIELD_ALLOWED.items():
+            values = schema.get(field_name, _EMPTY)
+            if not isinstance(values, (list, tuple)):
+                yield f"{field_name}는 리스트여야 합니다. 현재: {type(values)}"
                 continue
             
             for value in values:
-                if not isinstance(value, str):
-                    errors.append(f"{field_name}의 값은 모두 문자열이어야 합니다. 현재: {value} ({type(value)})")
-                elif value not in allowed_list:
-                    errors.append(f"{field_name}의 '{value}'는 허용 어휘 목록에 없습니다. 허용 목록: {allowed_list}")
+                if type(value) is not str:
+                    yield f"{field_name}의 값은 모두 문자열이어야 합니다. 현재: {value} ({type(value)})"
+                elif value not in allowed_set:
+                    yield f"{field_name}의 '{value}'는 허용 어휘 목록에 없습니다. 허용 목록: {self._FIELD_ALLOWED_LIST[field_name]}"
         
         # 개수 제한 검증
-        dress_lengths = schema.get("dress_lengths", [])
-        if isinstance(dress_lengths, list):
+        dress_lengths = schema.get("dress_lengths", _EMPTY)
+        if isinstance(dress_lengths, (list, tuple)):
             if len(dress_lengths) != 1:
-                errors.append(f"dress_lengths는 정확히 1개만 선택해야 합니다. 현재: {len(dress_lengths)}개")
+                yield f"dress_lengths는 정확히 1개만 선택해야 합니다. 현재: {len(dress_lengths)}개"
         
-        keyword = schema.get("keyword", [])
-        if isinstance(keyword, list):
+        keyword = schema.get("keyword", _EMPTY)
+        if isinstance(keyword, (list, tuple)):
             if len(keyword) < 1 or len(keyword) > 3:
-                errors.append(f"keyword는 1~3개만 선택해야 합니다. 현재: {len(keyword)}개")
+                yield f"keyword는 1~3개만 선택해야 합니다. 현재: {len(keyword)}개"
+
+    def validate_schema(self, schema: Dict[str, Any], fail_fast: bool = False) -> tuple[bool, List[str]]:
+        """
+        스키마가 규칙에 맞는지 검증
+
+        Args:
+            schema: 검증할 스키마 딕셔너리
+            fail_fast: True면 첫 번째 위반에서 검사를 멈춤 (errors는 최대 1개)
 
+        Returns:
+            (is_valid, errors) 튜플 - is_valid는 규칙 준수 여부, errors는 오류 메시지 리스트
+        """
+        if fail_fast:
+            first_error = next(self._iter_errors(schema), None)
+            errors = [] if first_error is None else [first_error]
+        else:
+            errors = list(self._iter_errors(schema))
         return len(errors) == 0, errors
 
+    def quick_validate(self, schema: Dict[str, Any]) -> bool:
+        """
+        스키마가 규칙에 맞는지만 빠르게 확인 (첫 위반에서 중단)
+
+        Args:
+            schema: 검증할 스키마 딕셔너리
+
+        Returns:
+            규칙 준수 여부
+        """
+        return self.validate_schema(schema, fail_fast=True)[0]
+
     def normalize_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
         스키마를 규칙에 맞게 정규화 (자동 수정)
@@ -243,180 +774,516 @@ class DressPromptGenerator:
         Returns:
             정규화된 스키마 딕셔너리
         """
-        import re
         normalized = schema.copy()
 
         # id 형식 정규화: 공백을 언더스코어로, 소문자로 변환, 특수문자 제거
-        if normalized.get("id"):
-            normalized["id"] = re.sub(r'[^a-zA-Z0-9_-]', '_', normalized["id"]).lower()
+        schema_id = normalized.get("id")
+        if schema_id and type(schema_id) is str:
+            normalized["id"] = _ID_NORM_RE.sub('_', schema_id).lower()
         
         # name 형식 정규화: 끝에 " 드레스" 추가 (없는 경우)
         # 주의: name은 자동 생성 함수에서 생성되므로 여기서는 형식만 확인
-        if normalized.get("name") and not normalized["name"].endswith(" 드레스"):
-            normalized["name"] = normalized["name"] + " 드레스"
+        name = normalized.get("name")
+        if name and type(name) is str and not name.endswith(" 드레스"):
+            normalized["name"] = name + " 드레스"
 
         # 배열 필드에서 허용되지 않은 값 제거
-        array_fields = {
-            "line": self.ALLOWED_LINES,
-            "material": self.ALLOWED_MATERIALS,
-            "neckline": self.ALLOWED_NECKLINES,
-            "sleeve": self.ALLOWED_SLEEVES,
-            "keyword": self.ALLOWED_KEYWORDS,
-            "detail": self.ALLOWED_DETAILS,
-            "dress_lengths": self.ALLOWED_DRESS_LENGTHS,
-        }
-
-        for field_name, allowed_list in array_fields.items():
-            if field_name in normalized and isinstance(normalized[field_name], list):
-                normalized[field_name] = [v for v in normalized[field_name] if v in allowed_list]
+        for field_name, allowed_set in self._FIELD_ALLOWED.items():
+            values = normalized.get(field_name)
+            if type(values) is list:
+                filtered = [v for v in values if v in allowed_set]
+                # 모두 허용 값이면 원래 리스트를 그대로 유지
+                if len(filtered) != len(values):
+                    normalized[field_name] = filtered
         
         # 개수 제한 적용
         # dress_lengths: 정확히 1개만 허용
-        if "dress_lengths" in normalized and isinstance(normalized["dress_lengths"], list):
-            if len(normalized["dress_lengths"]) > 1:
-                print(f"경고: dress_lengths는 1개만 선택 가능합니다. {len(normalized['dress_lengths'])}개 중 가장 근접한 한 개만 유지합니다.")
-                normalized["dress_lengths"] = [normalized["dress_lengths"][0]]
-            elif len(normalized["dress_lengths"]) == 0:
+        dress_lengths = normalized.get("dress_lengths")
+        if type(dress_lengths) is list:
+            if len(dress_lengths) > 1:
+                print(f"경고: dress_lengths는 1개만 선택 가능합니다. {len(dress_lengths)}개 중 가장 근접한 한 개만 유지합니다.")
+                normalized["dress_lengths"] = [dress_lengths[0]]
+            elif not dress_lengths:
                 print(f"경고: dress_lengths가 비어있습니다. 기본값 '발목 길이'를 설정합니다.")
                 normalized["dress_lengths"] = ["발목 길이"]
         
         # keyword: 1~3개만 허용
-        if "keyword" in normalized and isinstance(normalized["keyword"], list):
-            if len(normalized["keyword"]) > 3:
-                print(f"경고: keyword는 최대 3개까지만 선택 가능합니다. {len(normalized['keyword'])}개 중 가장 근접한 세 개만 유지합니다.")
-                normalized["keyword"] = normalized["keyword"][:3]
-            elif len(normalized["keyword"]) == 0:
+        keyword = normalized.get("keyword")
+        if type(keyword) is list:
+            if len(keyword) > 3:
+                print(f"경고: keyword는 최대 3개까지만 선택 가능합니다. {len(keyword)}개 중 가장 근접한 세 개만 유지합니다.")
+                normalized["keyword"] = keyword[:3]
+            elif not keyword:
                 print(f"경고: keyword가 비어있습니다. 기본값 '우아한'을 설정합니다.")
                 normalized["keyword"] = ["우아한"]
 
         return normalized
 
-    def analyze_dress_image(self, image_path: str) -> Dict[str, Any]:
+    def get_encoded(self, image_path: str, image_bytes: Optional[bytes] = None) -> EncodedImage:
+        """
+        분석 요청에 사용할 인코딩된 이미지 조회 (파일 경로면 메모이즈된 결과 재사용)
+
+        Args:
+            image_path: 이미지 파일 경로
+            image_bytes: 이미 읽어 둔 이미지 바이트 (주어지면 파일을 읽지 않음)
+
+        Returns:
+            EncodedImage (base64_encoded_data, media_type)
+        """
+        if image_bytes is not None:
+            return self.encode_image_bytes(image_bytes, image_path)
+        return self.encode_image(image_path)
+
+    def cache_key(self, image_path: str, image_bytes: Optional[bytes] = None) -> str:
+        """
+        분석 결과 캐시 키 생성 (이미지 내용, 모델, 프롬프트의 sha256)
+
+        Args:
+            image_path: 이미지 파일 경로
+            image_bytes: 이미 읽어 둔 이미지 바이트 (주어지면 파일을 읽지 않음)
+
+        Returns:
+            16진수 캐시 키
+        """
+        if image_bytes is not None:
+            image_digest = hashlib.sha256(image_bytes).digest()
+        else:
+            stat = _stat_image(image_path)
+            image_digest = _file_sha256_cached(str(image_path), stat.st_mtime_ns, stat.st_size)
+
+        h = hashlib.sha256(image_digest)
+        h.update(self.model.encode("utf-8"))
+        h.update(_ANALYSIS_PROMPT_HASH)
+        return h.hexdigest()
+
+    def load_cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        디스크 캐시에서 분석 결과 로드
+
+        Args:
+            key: cache_key로 만든 캐시 키
+
+        Returns:
+            캐시된 결과 (없거나 손상되었거나 읽을 수 없는 경우 None)
+        """
+        try:
+            return orjson.loads((self._cache_dir / f"{key}.json").read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return None
+        except OSError as e:
+            print(f"경고: 캐시를 읽지 못해 API를 호출합니다 ({e})")
+            return None
+
+    def save_cached_result(self, key: str, result: Dict[str, Any]):
+        """
+        분석 결과를 디스크 캐시에 저장 (임시 파일에 쓴 뒤 교체하여 부분 기록 방지)
+        저장에 실패해도 이미 받은 분석 결과를 잃지 않도록 경고만 출력
+
+        Args:
+            key: cache_key로 만든 캐시 키
+            result: 분석 결과
+        """
+        cache_path = self._cache_dir / f"{key}.json"
+        tmp_name = None
+        try:
+            # 같은 키를 여러 스레드가 동시에 저장할 수 있으므로 호출마다 고유한 임시 파일 사용
+            with tempfile.NamedTemporaryFile(
+                dir=self._cache_dir, prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as tmp:
+                tmp_name = tmp.name
+                tmp.write(orjson.dumps(result))
+            os.replace(tmp_name, cache_path)
+        except OSError as e:
+            print(f"경고: 분석 결과를 캐시에 저장하지 못했습니다 ({e})")
+            if tmp_name is not None:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+
+    def request_params(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        messages.create (또는 배치 요청 params)에 전달할 인자 구성
+        도구 호출을 강제해 응답을 항상 스키마에 맞는 JSON 입력으로 받음
+
+        Args:
+            messages: 요청 메시지 리스트
+
+        Returns:
+            요청 인자 딕셔너리
+        """
+        return {
+            "model": self.model,
+            "max_tokens": 2048,
+            "system": _SYSTEM_BLOCKS,
+            "tools": [self._SCHEMA_TOOL],
+            "tool_choice": {"type": "tool", "name": self._SCHEMA_TOOL["name"]},
+            "messages": messages,
+        }
+
+    def build_messages(self, image_data: str, media_type: str) -> List[Dict[str, Any]]:
+        """
+        이미지 분석 요청 메시지 구성 (분석 지침은 _SYSTEM_BLOCKS로 별도 전달)
+
+        Args:
+            image_data: base64 인코딩된 이미지
+            media_type: 이미지 media type
+
+        Returns:
+            messages.create에 전달할 메시지 리스트
+        """
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": media_type,
+                            "data": image_data,
+                        },
+                    },
+                    {
+                        "type": "text",
+                        "text": _USER_INSTRUCTION
+                    }
+                ],
+            }
+        ]
+
+    def _parse_text_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        텍스트 응답에서 JSON 파싱 (도구 호출 없이 텍스트로 답한 경우의 대비책)
+
+        Args:
+            response_text: 응답 텍스트
+
+        Returns:
+            파싱된 딕셔너리
+        """
+        try:
+            # 대부분 JSON만 응답하므로 원문 그대로 먼저 파싱
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            # JSON 추출 (마크다운 코드블록이 있을 수 있으므로)
+            match = _FENCE_RE.search(response_text)
+            response_text = match.group(1) if match else response_text.strip()
+            try:
+                return orjson.loads(response_text)
+            except orjson.JSONDecodeError as e:
+                print(f"JSON 파싱 오류: {e}")
+                print(f"원본 응답:\n{response_text}")
+                raise
+
+    def parse_response(self, message: Any) -> Dict[str, Any]:
+        """
+        API 응답을 파싱하고 스키마를 정규화
+
+        Args:
+            message: messages.create 응답 객체
+
+        Returns:
+            프롬프트와 스키마가 포함된 딕셔너리
+        """
+        # 도구 호출 응답이면 입력값이 곧 결과 JSON (파싱 불필요)
+        tool_use = next((block for block in message.content if block.type == "tool_use"), None)
+        if tool_use is not None:
+            result = dict(tool_use.input)
+            # 중첩 객체가 문자열로 직렬화되어 오는 경우 복원
+            if type(result.get("schema")) is str:
+                result["schema"] = self._parse_text_response(result["schema"])
+        else:
+            result = self._parse_text_response(message.content[0].text)
+
+        # 프롬프트 생성 로직은 당분간 사용하지 않음 (주석처리)
+        # prompt가 없으면 빈 문자열로 설정
+        if "prompt" not in result:
+            result["prompt"] = ""
+        
+        # 스키마 정규화 (검증은 재요청 여부 판단과 함께 호출 측에서 수행)
+        schema = result.get("schema", {})
+        if schema:
+            result["schema"] = self.normalize_schema(schema)
+        
+        return result
+
+    def needs_retry(self, result: Dict[str, Any], attempt: int) -> bool:
+        """
+        정규화 후에도 스키마가 규칙을 위반해 다시 요청해야 하는지 판단
+        (재시도 횟수를 모두 쓰면 경고만 출력하고 결과를 그대로 사용)
+
+        Args:
+            result: parse_response 결과
+            attempt: 현재 시도 번호 (0부터 시작)
+
+        Returns:
+            다시 요청해야 하면 True
+        """
+        schema = result.get("schema")
+        # 값싼 fail-fast 검사를 통과하면 전체 검증은 생략
+        if not schema or self.quick_validate(schema):
+            return False
+
+        if attempt < MAX_SCHEMA_RETRIES:
+            print(f"경고: 스키마가 규칙에 맞지 않아 다시 요청합니다 ({attempt + 1}/{MAX_SCHEMA_RETRIES})")
+            return True
+
+        self.report_invalid_schema(schema)
+        return False
+
+    def is_cacheable(self, result: Dict[str, Any]) -> bool:
+        """
+        분석 결과를 디스크 캐시에 저장해도 되는지 판단
+        (재시도 후에도 규칙을 위반한 결과를 저장하면 이후 호출에서 다시 요청하지 않게 됨)
+
+        Args:
+            result: parse_response 결과
+
+        Returns:
+            스키마가 있고 규칙을 준수하면 True
+        """
+        schema = result.get("schema")
+        return bool(schema) and self.quick_validate(schema)
+
+    def report_invalid_schema(self, schema: Dict[str, Any]):
+        """
+        스키마 검증 실패 내용을 경고로 출력 (규칙에 맞으면 아무것도 출력하지 않음)
+
+        Args:
+            schema: 정규화된 스키마 딕셔너리
+        """
+        is_valid, errors = self.validate_schema(schema)
+        if is_valid:
+            return
+
+        error_msg = "스키마 검증 실패:\n" + "\n".join(f"  - {e}" for e in errors)
+        print(f"경고: {error_msg}")
+        print(f"정규화된 스키마: {orjson.dumps(schema, option=_JSON_DUMP_OPTIONS).decode('utf-8')}")
+        # 검증 실패해도 정규화된 결과는 반환 (경고만 출력)
+
+    def build_retry_messages(self, messages: List[Dict[str, Any]], message: Any, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        이전 응답과 규칙 위반 내용을 덧붙여 재요청 메시지 구성
+
+        Args:
+            messages: 이전 요청 메시지 리스트
+            message: 이전 messages.create 응답 객체
+            result: 이전 응답의 parse_response 결과
+
+        Returns:
+            재요청에 사용할 메시지 리스트
+        """
+        _, errors = self.validate_schema(result["schema"])
+        feedback = "다음 규칙 위반을 수정하여 전체 결과를 다시 기록하세요:\n" + "\n".join(f"- {e}" for e in errors)
+
+        tool_use = next((block for block in message.content if block.type == "tool_use"), None)
+        if tool_use is None:
+            return messages + [
+                {"role": "assistant", "content": message.content[0].text},
+                {"role": "user", "content": feedback},
+            ]
+
+        # 도구 호출에는 tool_result로 오류를 돌려줘야 다음 턴에서 다시 호출함
+        return messages + [
+            {
+                "role": "assistant",
+                "content": [
+                    {"type": "tool_use", "id": tool_use.id, "name": tool_use.name, "input": tool_use.input},
+                ],
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "tool_result", "tool_use_id": tool_use.id, "content": feedback, "is_error": True},
+                ],
+            },
+        ]
+
+    def analyze_dress_image(self, image_path: str, image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
         """
         드레스 이미지를 분석하여 프롬프트와 스키마 생성
 
         Args:
             image_path: 드레스 이미지 파일 경로
+            image_bytes: 이미 읽어 둔 이미지 바이트 (주어지면 파일을 다시 읽지 않음)
 
         Returns:
             프롬프트와 스키마가 포함된 딕셔너리
         """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {image_path}")
+        # 같은 이미지를 같은 모델/프롬프트로 분석한 결과가 있으면 API 호출 생략
+        cache_key = None
+        if self.use_cache:
+            cache_key = self.cache_key(image_path, image_bytes)
+            cached = self.load_cached_result(cache_key)
+            if cached is not None:
+                return cached
 
         # 이미지 인코딩
-        image_data, media_type = self.encode_image(image_path)
-
-        # Claude API를 사용하여 이미지 분석
-        prompt = """이 드레스 이미지를 상세히 분석하여 다음을 생성해주세요:
-
-스키마: 아래 JSON 구조에 맞춰 한국어 태그만 사용해 작성하세요.
-   - 중요 규칙 (반드시 지켜야 함):
-     - id: name과 동일한 규칙으로 영문으로 작성하세요. 파일명으로 사용되므로 공백은 언더스코어(_)로, 특수문자는 피하세요.
-       name이 "A라인_비즈_새틴 드레스"이면 id는 "a-line_bead_satin" 형식입니다.
-       예시: "a-line_bead_satin", "sheath_satin"
-     - 아래 제공된 허용 어휘 목록에서만 선택해 정확히 같은 단어와 띄어쓰기를 사용하세요.
-     - 허용 목록에 없는 단어, 변형, 동의어, 영어 사용 금지 (id 제외).
-     - 배열 항목 순서는 중요하지 않으나, 의미 중복은 피하세요.
-     - color는 한국어 단일 문자열로 작성하세요. 예: "화이트", "아이보리", "블러쉬".
-     - name 형식은 반드시 "라인_소재 드레스" 또는 "라인_디테일_소재 드레스"로 작성하세요.
-       디테일이 있을 경우 대표적인 디테일 1개만 사용하세요.
-       예시: "A라인_비즈_새틴 드레스", "시스_새틴 드레스"
-     - **개수 제한 (매우 중요)**:
-       * dress_lengths: 정확히 1개만 선택
-       * keyword: 1~3개만 선택 (최대 3개)
-
-허용 어휘:
-- lines: ["티렝스", "미니", "A라인", "엠파이어라인", "시스", "H라인", "머메이드", "벨라인", "볼가운", "프린세스라인"]
-- materials: ["비즈", "새틴", "미카도실크", "오간자", "레이스", "쉬폰", "튤(망사)", "도비실크", "크레이프", "타프타실크"]
-- necklines: ["브이넥", "하트넥", "오프숄더", "하이넥", "보트넥", "스퀘어넥", "일루전 넥", "스트레이트 어크로스", "언밸런스", "홀터넥"]
-- sleeves: ["슬리브리스", "롱슬리브", "7부", "숏슬리브", "일루전슬리브", "비숍슬리브", "벨슬리브", "드레이프 슬리브", "퍼프슬리브"]
-- keywords: ["럭셔리", "드라마틱", "클래식", "우아한", "로맨틱", "빈티지", "모던", "미니멀", "귀여운", "볼륨", "포멀", "로얄", "시크", "도시적인"]
-- details: ["비즈", "시퀸", "긴 트레인", "드레이핑", "코르셋", "일루전 백", "아플리케 레이스", "리본", "러플", "레이어드 스커트", "플리츠"]
-- dress_lengths: ["종아리 길이", "발목 길이", "스윕 트레인(바닥 닿는 길이)", "채플 트레인(뒤가 약간 끌림)", "캐시드럴 트레인(뒤가 길게 끌림)", "미니", "무릎 길이"]
-
-응답은 반드시 아래 JSON 형식으로만 출력하세요(설명 금지):
-{
-  "prompt": "",
-  "schema": {
-    "id": "sheath_v-neck_3quarter_crepe",
-    "name": "A라인_비즈_새틴 드레스",
-    "line": ["허용된 lines 값들"],
-    "material": ["허용된 materials 값들"],
-    "color": "화이트",
-    "neckline": ["허용된 necklines 값들"],
-    "sleeve": ["허용된 sleeves 값들"],
-    "keyword": ["허용된 keywords 값들"],
-    "detail": ["허용된 details 값들"],
-    "dress_lengths": ["허용된 dress_lengths 값들"]
-  }
-}
-"""
+        image = self.get_encoded(image_path, image_bytes)
 
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=2048,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": image_data,
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": prompt
-                        }
-                    ],
-                }
-            ],
-        )
+        # Claude API를 사용하여 이미지 분석 (스키마 규칙 위반 시 최대 MAX_SCHEMA_RETRIES회 재요청)
+        messages = self.build_messages(image.data, image.media_type)
+        for attempt in range(MAX_SCHEMA_RETRIES + 1):
+            message = self.client.messages.create(**self.request_params(messages))
 
-        # 응답 파싱
-        response_text = message.content[0].text
+            result = self.parse_response(message)
+            if not self.needs_retry(result, attempt):
+                break
+            messages = self.build_retry_messages(messages, message, result)
 
-        # JSON 추출 (마크다운 코드블록이 있을 수 있으므로)
-        response_text = response_text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        if cache_key is not None and self.is_cacheable(result):
+            self.save_cached_result(cache_key, result)
+        return result
 
-        try:
-            result = json.loads(response_text)
-            
-            # 프롬프트 생성 로직은 당분간 사용하지 않음 (주석처리)
-            # prompt가 없으면 빈 문자열로 설정
-            if "prompt" not in result:
-                result["prompt"] = ""
-            
-            # 스키마 검증 및 정규화
-            schema = result.get("schema", {})
-            if schema:
-                # 먼저 정규화 수행
-                result["schema"] = self.normalize_schema(schema)
-                
-                # 검증 수행
-                is_valid, errors = self.validate_schema(result["schema"])
-                if not is_valid:
-                    error_msg = "스키마 검증 실패:\n" + "\n".join(f"  - {e}" for e in errors)
-                    print(f"경고: {error_msg}")
-                    print(f"정규화된 스키마: {json.dumps(result['schema'], ensure_ascii=False, indent=2)}")
-                    # 검증 실패해도 정규화된 결과는 반환 (경고만 출력)
-            
-            return result
-        except json.JSONDecodeError as e:
-            print(f"JSON 파싱 오류: {e}")
-            print(f"원본 응답:\n{response_text}")
-            raise
+    async def analyze_dress_image_async(self, image_path: str) -> Dict[str, Any]:
+        """
+        analyze_dress_image의 비동기 버전 (AsyncAnthropic 사용)
+
+        Args:
+            image_path: 드레스 이미지 파일 경로
+
+        Returns:
+            프롬프트와 스키마가 포함된 딕셔너리
+        """
+        # 캐시 키 계산(파일 해시)도 이벤트 루프를 막지 않도록 스레드에서 수행
+        cache_key = None
+        if self.use_cache:
+            cache_key = await asyncio.to_thread(self.cache_key, image_path)
+            cached = self.load_cached_result(cache_key)
+            if cached is not None:
+                return cached
+
+        # 파일 읽기/리사이즈/인코딩은 이벤트 루프를 막지 않도록 스레드에서 수행
+        image = await asyncio.to_thread(self.get_encoded, image_path)
+
+        messages = self.build_messages(image.data, image.media_type)
+        for attempt in range(MAX_SCHEMA_RETRIES + 1):
+            message = await self.async_client.messages.create(**self.request_params(messages))
+
+            result = self.parse_response(message)
+            if not self.needs_retry(result, attempt):
+                break
+            messages = self.build_retry_messages(messages, message, result)
+
+        if cache_key is not None and self.is_cacheable(result):
+            self.save_cached_result(cache_key, result)
+        return result
+
+    async def analyze_many(self, paths: List[str], concurrency: int = 8) -> List[Any]:
+        """
+        여러 이미지를 동시에 분석 (동시 요청 수는 concurrency로 제한)
+
+        Args:
+            paths: 드레스 이미지 파일 경로 리스트
+            concurrency: 최대 동시 API 요청 수
+
+        Returns:
+            입력 순서대로의 결과 리스트 (실패한 항목은 예외 객체)
+
+        Raises:
+            ValueError: concurrency가 1보다 작은 경우 (Semaphore(0)은 영원히 대기)
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency는 1 이상이어야 합니다: {concurrency}")
+        sem = asyncio.Semaphore(concurrency)
+
+        async def run(path: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.analyze_dress_image_async(path)
+
+        return await asyncio.gather(*(run(p) for p in paths), return_exceptions=True)
+
+    def analyze_batch(self, paths: List[str], poll_interval: float = BATCH_POLL_INTERVAL) -> List[Any]:
+        """
+        여러 이미지를 Message Batches API로 한 번에 분석 (실시간 호출 대비 비용 50%, 결과는 비동기로 완료)
+        배치 결과에는 재요청 루프를 적용하지 않으며, 규칙 위반 시 경고만 출력
+
+        Args:
+            paths: 드레스 이미지 파일 경로 리스트
+            poll_interval: 배치 완료 여부 확인 간격 (초)
+
+        Returns:
+            입력 순서대로의 결과 리스트 (실패한 항목은 예외 객체)
+        """
+        results: List[Any] = [None] * len(paths)
+        cache_keys: List[Optional[str]] = [None] * len(paths)
+        batch_ids: List[str] = []
+        # 요청 수와 이미지 데이터 크기 한도를 넘지 않도록 나눠 담고, 찬 배치는 바로 제출
+        chunk: List[Dict[str, Any]] = []
+        chunk_bytes = 0
+
+        def submit_chunk():
+            nonlocal chunk, chunk_bytes
+            batch = self.client.messages.batches.create(requests=chunk)
+            print(f"배치 제출 완료: {batch.id} (요청 {len(chunk)}개)")
+            batch_ids.append(batch.id)
+            # 제출한 요청의 이미지 데이터는 다음 배치를 만들기 전에 해제
+            chunk = []
+            chunk_bytes = 0
+
+        def prepare(image_path: str) -> tuple[Optional[str], Any]:
+            # (캐시 키, 캐시된 결과 또는 EncodedImage 또는 예외)
+            cache_key = None
+            try:
+                if self.use_cache:
+                    cache_key = self.cache_key(image_path)
+                    cached = self.load_cached_result(cache_key)
+                    if cached is not None:
+                        return cache_key, cached
+                return cache_key, self.get_encoded(image_path)
+            except Exception as e:
+                return cache_key, e
+
+        # 해시/디코드/리사이즈/인코딩은 Pillow·hashlib이 GIL을 놓는 구간이 많아 스레드로 병렬 처리
+        # (미리 인코딩해 두는 이미지 수를 제한해 메모리에는 현재 배치 분량만 유지)
+        with ThreadPoolExecutor(max_workers=BATCH_PREPARE_WORKERS) as executor:
+            prepared = _bounded_map(executor, prepare, paths, BATCH_PREPARE_WORKERS * 2)
+            for i, (cache_key, item) in enumerate(prepared):
+                cache_keys[i] = cache_key
+                if not isinstance(item, EncodedImage):
+                    results[i] = item
+                    continue
+
+                size = len(item.data)
+                if chunk and (len(chunk) >= BATCH_MAX_REQUESTS or chunk_bytes + size > BATCH_MAX_BYTES):
+                    submit_chunk()
+                chunk.append({
+                    "custom_id": f"img-{i}",
+                    "params": self.request_params(self.build_messages(item.data, item.media_type)),
+                })
+                chunk_bytes += size
+
+        if chunk:
+            submit_chunk()
+
+        # 모든 배치를 제출해 서버에서 함께 처리되도록 한 뒤 차례로 완료를 기다림
+        for batch_id in batch_ids:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            while batch.processing_status != "ended":
+                time.sleep(poll_interval)
+                batch = self.client.messages.batches.retrieve(batch_id)
+
+            # custom_id의 입력 인덱스로 결과를 원래 순서에 배치
+            for entry in self.client.messages.batches.results(batch.id):
+                i = int(entry.custom_id.split("-", 1)[1])
+                if entry.result.type != "succeeded":
+                    results[i] = RuntimeError(f"배치 요청 실패: {entry.result.type}")
+                    continue
+
+                try:
+                    result = self.parse_response(entry.result.message)
+                except Exception as e:
+                    results[i] = e
+                    continue
+
+                if result.get("schema"):
+                    self.report_invalid_schema(result["schema"])
+                if cache_keys[i] is not None and self.is_cacheable(result):
+                    self.save_cached_result(cache_keys[i], result)
+                results[i] = result
+
+        return results
 
     def save_result(self, result: Dict[str, Any], output_path: str):
         """
@@ -426,8 +1293,9 @@ class DressPromptGenerator:
             result: 분석 결과
             output_path: 출력 파일 경로
         """
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        Path(output_path).write_bytes(
+            orjson.dumps(result, option=_JSON_DUMP_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        )
 
         print(f"✓ 결과가 저장되었습니다: {output_path}")
 
@@ -444,17 +1312,21 @@ def main():
   python dress_prompt_generator.py input.png
   python dress_prompt_generator.py input.png -o output.json
   python dress_prompt_generator.py input.png --show
+  python dress_prompt_generator.py *.png --concurrency 8
+  python dress_prompt_generator.py *.png --batch-api
         """
     )
 
     parser.add_argument(
-        "image_path",
-        help="분석할 드레스 이미지 파일 경로"
+        "image_paths",
+        nargs="+",
+        metavar="image_path",
+        help="분석할 드레스 이미지 파일 경로 (여러 개 지정 시 동시 분석)"
     )
 
     parser.add_argument(
         "-o", "--output",
-        help="결과를 저장할 JSON 파일 경로 (기본: 입력파일명_result.json)",
+        help="결과를 저장할 JSON 파일 경로 (기본: 입력파일명_result.json, 이미지 1개일 때만 사용)",
         default=None
     )
 
@@ -470,37 +1342,79 @@ def main():
         default=None
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="분석 결과 디스크 캐시를 사용하지 않고 항상 API를 호출"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="여러 이미지 분석 시 최대 동시 API 요청 수 (기본: 8)"
+    )
+
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Message Batches API로 제출 (비용 50%%, 결과가 나올 때까지 대기)"
+    )
+
     args = parser.parse_args()
 
+    if args.output is not None and len(args.image_paths) > 1:
+        parser.error("-o/--output은 이미지를 1개만 지정할 때 사용할 수 있습니다.")
+    if args.concurrency < 1:
+        parser.error("--concurrency는 1 이상이어야 합니다.")
+
     try:
         # 생성기 초기화
-        generator = DressPromptGenerator(api_key=args.api_key)
+        generator = DressPromptGenerator(api_key=args.api_key, use_cache=not args.no_cache)
 
         # 이미지 분석
-        print(f"이미지 분석 중: {args.image_path}")
-        result = generator.analyze_dress_image(args.image_path)
-
-        # 결과 출력
-        if args.show:
-            print("\n" + "="*80)
-            print("IMAGE PROMPT:")
-            print("="*80)
-            print(result.get("prompt", ""))
-            print("\n" + "="*80)
-            print("SCHEMA:")
-            print("="*80)
-            print(json.dumps(result.get("schema", {}), ensure_ascii=False, indent=2))
-            print("="*80 + "\n")
-
-        # 결과 저장
-        if args.output is None:
-            # 기본 출력 파일명 생성
-            input_path = Path(args.image_path)
-            output_path = input_path.parent / f"{input_path.stem}_result.json"
+        if args.batch_api:
+            print(f"이미지 {len(args.image_paths)}개를 배치로 분석 중 (완료까지 수 분 이상 걸릴 수 있음)...")
+            results = generator.analyze_batch(args.image_paths)
+        elif len(args.image_paths) == 1:
+            print(f"이미지 분석 중: {args.image_paths[0]}")
+            results = [generator.analyze_dress_image(args.image_paths[0])]
         else:
-            output_path = Path(args.output)
+            print(f"이미지 {len(args.image_paths)}개 분석 중 (동시 요청 {args.concurrency}개)...")
+            results = asyncio.run(generator.analyze_many(args.image_paths, concurrency=args.concurrency))
+
+        failed = 0
+        for image_path, result in zip(args.image_paths, results):
+            if isinstance(result, Exception):
+                failed += 1
+                print(f"오류 발생 ({image_path}): {result}", file=sys.stderr)
+                continue
+
+            # 결과 출력
+            if args.show:
+                print("\n" + "="*80)
+                print(f"IMAGE PROMPT: {image_path}")
+                print("="*80)
+                print(result.get("prompt", ""))
+                print("\n" + "="*80)
+                print("SCHEMA:")
+                print("="*80)
+                print(orjson.dumps(result.get("schema", {}), option=_JSON_DUMP_OPTIONS).decode("utf-8"))
+                print("="*80 + "\n")
+
+            # 결과 저장
+            if args.output is None:
+                # 기본 출력 파일명 생성
+                input_path = Path(image_path)
+                output_path = input_path.parent / f"{input_path.stem}_result.json"
+            else:
+                output_path = Path(args.output)
+
+            generator.save_result(result, str(output_path))
 
-        generator.save_result(result, str(output_path))
+        if failed:
+            print(f"\n{failed}개 이미지 분석에 실패했습니다.", file=sys.stderr)
+            sys.exit(1)
 
         print(f"\n✓ 완료! 프롬프트와 스키마가 생성되었습니다.")
 